@@ -0,0 +1,187 @@
+import os
+from typing import Dict, Iterator, Optional, Tuple, Union
+
+import numpy as np
+from xarray import Dataset
+
+
+class EOF:
+    """
+    EOF/PCA разложение поля param методом рандомизированного SVD.
+
+    Матрица время x ячейки не строится целиком: каждый проход читает ds
+    чанками по valid_time и накапливает только малые матрицы (time x l и
+    l x ячейки, l = n_modes + oversample). Ячейки взвешиваются sqrt(cos(lat)),
+    ячейки с NaN хотя бы в одном кадре (sst над сушей) исключаются.
+    """
+
+    def __init__(
+        self,
+        n_modes: int = 10,
+        oversample: int = 10,
+        n_iter: int = 2,
+        chunk_size: int = 24,
+        seed: Optional[int] = None,
+    ):
+        self.n_modes = n_modes
+        self.oversample = oversample
+        self.n_iter = n_iter
+        self.chunk_size = chunk_size
+        self.seed = seed
+
+        self.param: Optional[str] = None
+        self.components: Optional[np.ndarray] = None  # (modes, valid cells)
+
+    def _chunks(self, ds: Dataset, param: str) -> Iterator[Tuple[slice, np.ndarray]]:
+        """(slice, (time, lat * lon) float64) по чанкам valid_time."""
+        arr = ds[param].transpose("valid_time", "latitude", "longitude")
+        n_time = arr.sizes["valid_time"]
+        for start in range(0, n_time, self.chunk_size):
+            rows = slice(start, min(start + self.chunk_size, n_time))
+            values = arr.isel(valid_time=rows).values.astype(np.float64)
+            yield rows, values.reshape(values.shape[0], -1)
+
+    def _anomalies(self, values: np.ndarray) -> np.ndarray:
+        """Взвешенные аномалии на валидных ячейках: (time, valid cells)."""
+        return (values[:, self.valid] - self.mean) * self.weights
+
+    def fit(self, ds: Dataset, param: str) -> "EOF":
+        self.param = param
+        self.shape = (ds.sizes["latitude"], ds.sizes["longitude"])
+        n_time = ds.sizes["valid_time"]
+        n_cells = self.shape[0] * self.shape[1]
+
+        # Проход 1: среднее и маска ячеек без пропусков
+        total = np.zeros(n_cells)
+        count = np.zeros(n_cells, dtype=np.int64)
+        for _, values in self._chunks(ds, param):
+            valid = ~np.isnan(values)
+            total += np.where(valid, values, 0.0).sum(axis=0)
+            count += valid.sum(axis=0)
+
+        self.valid = count == n_time
+        if not self.valid.any():
+            raise ValueError("No grid cells without NaN")
+        self.mean = total[self.valid] / n_time
+
+        lat = np.deg2rad(ds["latitude"].values.astype(np.float64))
+        weights = np.sqrt(np.clip(np.cos(lat), 0.0, None))
+        self.weights = np.repeat(weights, self.shape[1])[self.valid]
+
+        n_valid = int(self.valid.sum())
+        rank = min(self.n_modes + self.oversample, n_time, n_valid)
+        rng = np.random.default_rng(self.seed)
+
+        # Проход 2: Y = A @ Omega
+        omega = rng.standard_normal((n_valid, rank))
+        Y = np.empty((n_time, rank))
+        for rows, values in self._chunks(ds, param):
+            Y[rows] = self._anomalies(values) @ omega
+        del omega
+
+        # Степенные итерации: Z = A^T Q, Y = A Z (по два прохода на итерацию)
+        for _ in range(self.n_iter):
+            Q = np.linalg.qr(Y)[0]
+            Z = np.zeros((n_valid, rank))
+            for rows, values in self._chunks(ds, param):
+                Z += self._anomalies(values).T @ Q[rows]
+            Z = np.linalg.qr(Z)[0]
+            for rows, values in self._chunks(ds, param):
+                Y[rows] = self._anomalies(values) @ Z
+            del Z
+
+        # Последний проход: B = Q^T A и полная дисперсия
+        Q = np.linalg.qr(Y)[0]
+        B = np.zeros((rank, n_valid))
+        total_var = 0.0
+        for rows, values in self._chunks(ds, param):
+            anomalies = self._anomalies(values)
+            B += Q[rows].T @ anomalies
+            total_var += float(np.sum(anomalies**2))
+
+        U_b, S, Vt = np.linalg.svd(B, full_matrices=False)
+        k = min(self.n_modes, rank)
+
+        self.singular_values = S[:k]
+        self.components = Vt[:k]
+        self.pcs = (Q @ U_b[:, :k]) * S[:k]
+        self.explained_variance_ratio = S[:k] ** 2 / total_var
+        self.valid_time = ds["valid_time"].values
+
+        return self
+
+    def result(self) -> Dict:
+        """Моды на сетке (NaN вне валидных ячеек), главные компоненты и доли."""
+        if self.components is None:
+            raise ValueError("EOF is not fitted")
+
+        eofs = np.full((self.components.shape[0],) + self.shape, np.nan)
+        eofs.reshape(eofs.shape[0], -1)[:, self.valid] = self.components
+
+        return {
+            "param": self.param,
+            "eofs": eofs,
+            "pcs": self.pcs,
+            "singular_values": self.singular_values,
+            "explained_variance_ratio": self.explained_variance_ratio,
+            "valid_time": self.valid_time,
+        }
+
+    def project(
+        self, ds: Dataset, frame: Union[int, slice, None] = None
+    ) -> Dict[str, np.ndarray]:
+        """Проекция новых кадров на найденные моды: (time, modes)."""
+        if self.components is None:
+            raise ValueError("EOF is not fitted")
+        if frame is not None:
+            ds = ds.isel(valid_time=[frame] if isinstance(frame, int) else frame)
+
+        pcs = np.empty((ds.sizes["valid_time"], self.components.shape[0]))
+        for rows, values in self._chunks(ds, self.param):
+            pcs[rows] = self._anomalies(values) @ self.components.T
+
+        return {"valid_time": ds["valid_time"].values, "pcs": pcs}
+
+    def save(self, path: str) -> None:
+        """Сохраняет моды в .npz для проекции без повторного fit."""
+        if self.components is None:
+            raise ValueError("EOF is not fitted")
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez(
+            path,
+            param=np.array(self.param),
+            shape=np.array(self.shape),
+            valid=self.valid,
+            mean=self.mean,
+            weights=self.weights,
+            components=self.components,
+            singular_values=self.singular_values,
+            pcs=self.pcs,
+            explained_variance_ratio=self.explained_variance_ratio,
+            valid_time=self.valid_time,
+            chunk_size=np.array(self.chunk_size),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "EOF":
+        """Загружает моды, сохранённые через save()."""
+        with np.load(path) as data:
+            eof = cls(
+                n_modes=data["components"].shape[0],
+                chunk_size=int(data["chunk_size"]),
+            )
+            eof.param = str(data["param"])
+            eof.shape = tuple(int(n) for n in data["shape"])
+            for name in [
+                "valid",
+                "mean",
+                "weights",
+                "components",
+                "singular_values",
+                "pcs",
+                "explained_variance_ratio",
+                "valid_time",
+            ]:
+                setattr(eof, name, data[name])
+        return eof
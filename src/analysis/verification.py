@@ -0,0 +1,230 @@
+import csv
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from xarray import Dataset
+
+from src.data.aggregate import TemporalAggregator, group_keys
+from src.utils.params import PARAMS
+
+# Прогноз: (кадры init, заблаговременность в часах) -> {param: (init, lat, lon)}.
+# Подходит, например, lambda init, lead: model.predict(ds, init, lead)
+Forecast = Callable[[np.ndarray, int], Dict[str, np.ndarray]]
+
+# Регион: bbox (north, west, south, east), как у download.py, или маска (lat, lon)
+Region = Union[Tuple[float, float, float, float], np.ndarray, None]
+
+STATS = ["w", "we", "we2", "wabs", "wfa", "wff", "waa"]
+
+
+class ScoreStats:
+    """
+    Достаточные статистики для RMSE, bias, MAE и ACC: взвешенные суммы
+    ошибок и аномалий. Статистики разных чанков/месяцев складываются.
+    """
+
+    def __init__(self, **sums: float):
+        for name in STATS:
+            setattr(self, name, float(sums.get(name, 0.0)))
+
+    def __add__(self, other: "ScoreStats") -> "ScoreStats":
+        return ScoreStats(**{n: getattr(self, n) + getattr(other, n) for n in STATS})
+
+    def update(
+        self,
+        forecast: np.ndarray,
+        analysis: np.ndarray,
+        weights: np.ndarray,
+        clim: Optional[np.ndarray] = None,
+    ) -> None:
+        """Добавляет чанк (time, lat, lon); NaN в прогнозе или анализе пропускаются."""
+        valid = ~(np.isnan(forecast) | np.isnan(analysis))
+        w = np.where(valid, weights, 0.0)
+        f = np.where(valid, forecast, 0.0).astype(np.float64)
+        a = np.where(valid, analysis, 0.0).astype(np.float64)
+        e = f - a
+
+        self.w += float(w.sum())
+        self.we += float((w * e).sum())
+        self.we2 += float((w * e**2).sum())
+        self.wabs += float((w * np.abs(e)).sum())
+
+        if clim is not None:
+            # Для ACC дополнительно исключаем точки без климатологии
+            clim_valid = valid & ~np.isnan(clim)
+            w = np.where(clim_valid, weights, 0.0)
+            c = np.where(clim_valid, clim, 0.0)
+            fa = np.where(clim_valid, f - c, 0.0)
+            aa = np.where(clim_valid, a - c, 0.0)
+            self.wfa += float((w * fa * aa).sum())
+            self.wff += float((w * fa**2).sum())
+            self.waa += float((w * aa**2).sum())
+
+    def scores(self) -> Dict[str, float]:
+        if self.w == 0:
+            return {"rmse": np.nan, "bias": np.nan, "mae": np.nan, "acc": np.nan}
+
+        denom = np.sqrt(self.wff * self.waa)
+        return {
+            "rmse": float(np.sqrt(self.we2 / self.w)),
+            "bias": self.we / self.w,
+            "mae": self.wabs / self.w,
+            "acc": self.wfa / denom if denom > 0 else np.nan,
+        }
+
+
+def region_weights(ds: Dataset, regions: Dict[str, Region]) -> Dict[str, np.ndarray]:
+    """Площадные веса cos(lat) на сетке (lat, lon) с нулями вне региона."""
+    lat = ds["latitude"].values
+    lon = ds["longitude"].values
+    cos_lat = np.clip(np.cos(np.deg2rad(lat)), 0.0, None)[:, None]
+    base = np.broadcast_to(cos_lat, (lat.size, lon.size))
+
+    weights = {}
+    for name, region in regions.items():
+        if region is None:
+            mask = np.ones(base.shape, dtype=bool)
+        elif isinstance(region, np.ndarray):
+            mask = region.astype(bool)
+        else:
+            north, west, south, east = region
+            # Долготный интервал может пересекать 0/180 меридиан
+            span = (east - west) % 360.0 if east - west < 360.0 else 360.0
+            in_lon = (lon - west) % 360.0 <= span
+            in_lat = (lat <= north) & (lat >= south)
+            mask = in_lat[:, None] & in_lon[None, :]
+        weights[name] = np.where(mask, base, 0.0)
+
+    return weights
+
+
+def _verify_lead(
+    forecast: Forecast,
+    analysis: Dataset,
+    init: np.ndarray,
+    lead: int,
+    params: Sequence[str],
+    weights: Dict[str, np.ndarray],
+    climatology: Optional[TemporalAggregator],
+    chunk_size: int,
+) -> Dict[Tuple[str, int, str], ScoreStats]:
+    """Статистики одной заблаговременности, чанками по init."""
+    times = analysis["valid_time"].values
+    stats = {(p, lead, r): ScoreStats() for p in params for r in weights}
+
+    # Оставляем только init, для которых есть анализ на init + lead
+    target_times = times[init] + np.timedelta64(lead, "h")
+    target = np.searchsorted(times, target_times)
+    has_target = target < times.size
+    has_target[has_target] = times[target[has_target]] == target_times[has_target]
+    init, target = init[has_target], target[has_target]
+
+    for start in range(0, init.size, chunk_size):
+        init_chunk = init[start : start + chunk_size]
+        target_chunk = target[start : start + chunk_size]
+        fields = forecast(init_chunk, lead)
+
+        if climatology is not None:
+            keys = group_keys(times[target_chunk], climatology.freq)
+
+        for p in params:
+            obs = (
+                analysis[p]
+                .isel(valid_time=target_chunk)
+                .transpose("valid_time", "latitude", "longitude")
+                .values
+            )
+            clim = (
+                climatology.mean(p, keys)
+                if climatology is not None and p in climatology.acc
+                else None
+            )
+            for r, w in weights.items():
+                stats[(p, lead, r)].update(fields[p], obs, w, clim)
+
+    return stats
+
+
+def verify(
+    forecast: Forecast,
+    analysis: Dataset,
+    init: Iterable[int],
+    leads: Iterable[int],
+    params: Optional[Sequence[str]] = None,
+    regions: Optional[Dict[str, Region]] = None,
+    climatology: Optional[TemporalAggregator] = None,
+    chunk_size: int = 8,
+    n_workers: Optional[int] = None,
+) -> Dict[Tuple[str, int, str], ScoreStats]:
+    """
+    Потоковая верификация прогнозов по анализу (ERA5).
+
+    init — индексы кадров analysis, от которых строятся прогнозы; для каждой
+    заблаговременности из leads (в часах) прогнозы запрашиваются чанками по
+    chunk_size init, так что целиком куб прогнозов в памяти не хранится.
+    Заблаговременности считаются параллельно. Для ACC нужна climatology
+    (например, TemporalAggregator с freq="diurnal" или "doy").
+    """
+    params = list(params or PARAMS)
+    init = np.asarray(list(init), dtype=np.int64)
+
+    if climatology is not None and not (
+        np.array_equal(climatology.latitude, analysis["latitude"].values)
+        and np.array_equal(climatology.longitude, analysis["longitude"].values)
+    ):
+        raise ValueError("Grid of climatology does not match grid of analysis")
+
+    weights = region_weights(analysis, regions or {"global": None})
+
+    with ThreadPoolExecutor(max_workers=n_workers) as pool:
+        futures = [
+            pool.submit(
+                _verify_lead,
+                forecast,
+                analysis,
+                init,
+                lead,
+                params,
+                weights,
+                climatology,
+                chunk_size,
+            )
+            for lead in leads
+        ]
+        stats = {}
+        for future in futures:
+            stats.update(future.result())
+
+    return stats
+
+
+def merge_stats(
+    *runs: Dict[Tuple[str, int, str], ScoreStats],
+) -> Dict[Tuple[str, int, str], ScoreStats]:
+    """Объединяет статистики нескольких прогонов (например, по месяцам)."""
+    merged: Dict[Tuple[str, int, str], ScoreStats] = {}
+    for run in runs:
+        for key, stat in run.items():
+            merged[key] = merged[key] + stat if key in merged else stat
+    return merged
+
+
+def score_table(stats: Dict[Tuple[str, int, str], ScoreStats]) -> List[Dict]:
+    """Плоская таблица оценок: одна строка на (param, lead, region)."""
+    rows = []
+    for (param, lead, region), stat in sorted(stats.items()):
+        rows.append({"param": param, "lead": lead, "region": region, **stat.scores()})
+    return rows
+
+
+def write_scores(rows: List[Dict], path: str) -> None:
+    """Сохраняет таблицу оценок в CSV."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(
+            f, fieldnames=["param", "lead", "region", "rmse", "bias", "mae", "acc"]
+        )
+        writer.writeheader()
+        writer.writerows(rows)
@@ -0,0 +1,342 @@
+import glob
+import os
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+from xarray import Dataset
+
+# Способы группировки по valid_time:
+# календарные (hour/day/month) — число групп растёт вместе с архивом, поэтому
+# в памяти держатся только открытые группы, завершённые выгружаются в out_dir;
+# климатические (diurnal/monthly/doy) — фиксированное число групп.
+FREQS = {
+    "hour": None,
+    "day": None,
+    "month": None,
+    "diurnal": 24,
+    "monthly": 12,
+    "doy": 366,
+}
+
+# Номер первого дня месяца в високосном году (ключи freq="doy")
+LEAP_MONTH_START = np.array([0, 31, 60, 91, 121, 152, 182, 213, 244, 274, 305, 335])
+
+
+def group_keys(times: np.ndarray, freq: str) -> np.ndarray:
+    """Целочисленные ключи групп для массива datetime64 (векторно)."""
+    times = np.asarray(times, dtype="datetime64[ns]")
+    if freq == "hour":
+        return times.astype("datetime64[h]").astype(np.int64)
+    if freq == "day":
+        return times.astype("datetime64[D]").astype(np.int64)
+    if freq == "month":
+        return times.astype("datetime64[M]").astype(np.int64)
+    if freq == "diurnal":
+        return times.astype("datetime64[h]").astype(np.int64) % 24
+    if freq == "monthly":
+        return times.astype("datetime64[M]").astype(np.int64) % 12
+    if freq == "doy":
+        # Календарь високосного года (366 слотов): один и тот же (месяц, день)
+        # всегда даёт один ключ, 29 февраля — отдельный слот
+        months = times.astype("datetime64[M]")
+        month_start = months.astype("datetime64[D]")
+        days = (times.astype("datetime64[D]") - month_start).astype(np.int64)
+        return LEAP_MONTH_START[months.astype(np.int64) % 12] + days
+    raise ValueError(f"freq must be one of: {', '.join(FREQS)}")
+
+
+def key_labels(keys: np.ndarray, freq: str) -> np.ndarray:
+    """Обратное преобразование ключей: datetime64 для календарных групп."""
+    if freq == "hour":
+        return keys.astype("datetime64[h]")
+    if freq == "day":
+        return keys.astype("datetime64[D]")
+    if freq == "month":
+        return keys.astype("datetime64[M]")
+    return keys
+
+
+def _group_result(
+    keys: np.ndarray,
+    freq: str,
+    latitude: np.ndarray,
+    longitude: np.ndarray,
+    acc: Dict[str, np.ndarray],
+) -> Dict:
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = acc["sum"] / acc["count"]
+    mean[acc["count"] == 0] = np.nan
+
+    return {
+        "keys": keys,
+        "labels": key_labels(keys, freq),
+        "latitude": latitude,
+        "longitude": longitude,
+        "mean": mean,
+        "sum": acc["sum"],
+        "count": acc["count"],
+        "min": acc["min"],
+        "max": acc["max"],
+    }
+
+
+def load_groups(out_dir: str, freq: str, param: str) -> Dict:
+    """
+    Завершённые календарные группы, выгруженные TemporalAggregator в out_dir,
+    в том же формате, что и TemporalAggregator.result().
+    """
+    paths = glob.glob(os.path.join(out_dir, f"{freq}_*.npz"))
+    if not paths:
+        raise FileNotFoundError(f"No {freq} groups in {out_dir}")
+
+    keys = []
+    fields: Dict[str, list] = {name: [] for name in ("sum", "count", "min", "max")}
+    for path in paths:
+        with np.load(path) as data:
+            keys.append(int(data["key"]))
+            for name in fields:
+                fields[name].append(data[f"{param}__{name}"])
+            latitude, longitude = data["latitude"], data["longitude"]
+
+    order = np.argsort(keys)
+    acc = {name: np.stack(arrays)[order] for name, arrays in fields.items()}
+    return _group_result(
+        np.array(keys, dtype=np.int64)[order], freq, latitude, longitude, acc
+    )
+
+
+class TemporalAggregator:
+    """
+    Потоковая агрегация полей по valid_time: суммы, количества и экстремумы
+    по группам за один проход по чанкам времени. Аккумуляторы можно сохранить
+    и дополнять новыми днями без полного пересчёта.
+
+    Для календарных частот (hour/day/month) в памяти и в save() остаются
+    только открытые группы (не раньше группы последнего кадра). Завершённые
+    группы пишутся в out_dir по одному .npz на группу (читаются обратно через
+    load_groups), а без out_dir отбрасываются.
+    """
+
+    def __init__(
+        self,
+        freq: str = "diurnal",
+        params: Optional[Iterable[str]] = None,
+        chunk_size: int = 24,
+        out_dir: Optional[str] = None,
+    ):
+        if freq not in FREQS:
+            raise ValueError(f"freq must be one of: {', '.join(FREQS)}")
+
+        self.freq = freq
+        self.params = list(params) if params is not None else None
+        self.chunk_size = chunk_size
+        self.out_dir = out_dir
+
+        self.keys = (
+            np.arange(FREQS[freq], dtype=np.int64)
+            if FREQS[freq] is not None
+            else np.empty(0, dtype=np.int64)
+        )
+        self.latitude: Optional[np.ndarray] = None
+        self.longitude: Optional[np.ndarray] = None
+        self.last_time: Optional[np.datetime64] = None
+        self.acc: Dict[str, Dict[str, np.ndarray]] = {}
+
+    def _init_acc(self, param: str, shape: tuple) -> None:
+        n = self.keys.size
+        self.acc[param] = {
+            "sum": np.zeros((n,) + shape, dtype=np.float64),
+            "count": np.zeros((n,) + shape, dtype=np.int32),
+            "min": np.full((n,) + shape, np.nan, dtype=np.float32),
+            "max": np.full((n,) + shape, np.nan, dtype=np.float32),
+        }
+
+    def _grow(self, new_keys: np.ndarray) -> None:
+        """Добавление новых календарных групп (ключи остаются отсортированными)."""
+        missing = np.setdiff1d(new_keys, self.keys)
+        if missing.size == 0:
+            return
+
+        keys = np.union1d(self.keys, missing)
+        pos = np.searchsorted(keys, self.keys)
+        for param, acc in self.acc.items():
+            for name, arr in acc.items():
+                fill = 0 if name in ("sum", "count") else np.nan
+                grown = np.full((keys.size,) + arr.shape[1:], fill, dtype=arr.dtype)
+                grown[pos] = arr
+                acc[name] = grown
+        self.keys = keys
+
+    def _flush(self, open_key: int) -> None:
+        """Выгрузка завершённых календарных групп (ключ < open_key) в out_dir."""
+        # Ключи отсортированы: завершённые группы — префикс
+        n = int(np.searchsorted(self.keys, open_key))
+        if n == 0:
+            return
+
+        if self.out_dir is not None:
+            os.makedirs(self.out_dir, exist_ok=True)
+            labels = key_labels(self.keys[:n], self.freq)
+            for i in range(n):
+                arrays = {
+                    "key": self.keys[i],
+                    "latitude": self.latitude,
+                    "longitude": self.longitude,
+                }
+                for param, acc in self.acc.items():
+                    for name, arr in acc.items():
+                        arrays[f"{param}__{name}"] = arr[i]
+                np.savez(
+                    os.path.join(self.out_dir, f"{self.freq}_{labels[i]}.npz"),
+                    **arrays,
+                )
+
+        self.keys = self.keys[n:]
+        for acc in self.acc.values():
+            for name, arr in acc.items():
+                # Копия, чтобы освободить память завершённых групп
+                acc[name] = arr[n:].copy()
+
+    def _accumulate(self, param: str, values: np.ndarray, keys: np.ndarray) -> None:
+        """Групповые редукции по чанку через reduceat по отсортированным ключам."""
+        order = np.argsort(keys, kind="stable")
+        keys_sorted = keys[order]
+        values = values[order]
+
+        starts = np.flatnonzero(np.r_[True, keys_sorted[1:] != keys_sorted[:-1]])
+        idx = np.searchsorted(self.keys, keys_sorted[starts])
+
+        valid = ~np.isnan(values)
+        acc = self.acc[param]
+        acc["sum"][idx] += np.add.reduceat(np.where(valid, values, 0.0), starts, 0)
+        acc["count"][idx] += np.add.reduceat(valid, starts, 0, dtype=np.int32)
+        acc["min"][idx] = np.fmin(acc["min"][idx], np.fmin.reduceat(values, starts, 0))
+        acc["max"][idx] = np.fmax(acc["max"][idx], np.fmax.reduceat(values, starts, 0))
+
+    def update(self, ds: Dataset) -> int:
+        """
+        Добавляет в аккумуляторы кадры ds, которые новее уже учтённых.
+        Возвращает число обработанных кадров.
+        """
+        params = self.params or [p for p in ds.data_vars if "valid_time" in ds[p].sizes]
+        times = ds["valid_time"].values.astype("datetime64[ns]")
+
+        if self.latitude is None:
+            self.latitude = ds["latitude"].values
+            self.longitude = ds["longitude"].values
+        elif (
+            self.latitude.shape != ds["latitude"].shape
+            or self.longitude.shape != ds["longitude"].shape
+        ):
+            raise ValueError("Grid of ds does not match accumulated grid")
+
+        # Инкрементальность: пропускаем уже учтённые valid_time
+        if self.last_time is not None:
+            new = np.flatnonzero(times > self.last_time)
+        else:
+            new = np.arange(times.size)
+        if new.size == 0:
+            return 0
+
+        # Календарные группы завершаются по порядку valid_time
+        new = new[np.argsort(times[new], kind="stable")]
+        keys_all = group_keys(times[new], self.freq)
+        calendar = FREQS[self.freq] is None
+
+        shape = (self.latitude.size, self.longitude.size)
+        for param in params:
+            if param not in self.acc:
+                self._init_acc(param, shape)
+
+        for start in range(0, new.size, self.chunk_size):
+            chunk = new[start : start + self.chunk_size]
+            keys = keys_all[start : start + self.chunk_size]
+            if calendar:
+                self._grow(np.unique(keys))
+            for param in params:
+                values = (
+                    ds[param]
+                    .isel(valid_time=chunk)
+                    .transpose("valid_time", "latitude", "longitude")
+                    .values
+                )
+                self._accumulate(param, values, keys)
+            if calendar:
+                # Группы раньше последнего кадра чанка больше не пополнятся
+                self._flush(keys[-1])
+
+        self.last_time = times[new[-1]]
+        return int(new.size)
+
+    def result(self, param: str) -> Dict:
+        """
+        Средние, количества и экстремумы по группам в памяти для параметра
+        (для календарных частот — открытые группы, остальные в load_groups).
+        """
+        if param not in self.acc:
+            raise KeyError(f"{param} not accumulated")
+
+        return _group_result(
+            self.keys, self.freq, self.latitude, self.longitude, self.acc[param]
+        )
+
+    def mean(self, param: str, keys: np.ndarray) -> np.ndarray:
+        """
+        Средние только для групп keys (без расчёта всей климатологии).
+        Для групп, которых нет в аккумуляторах, возвращается NaN.
+        """
+        if param not in self.acc:
+            raise KeyError(f"{param} not accumulated")
+
+        idx = np.minimum(np.searchsorted(self.keys, keys), self.keys.size - 1)
+        known = (self.keys.size > 0) & (self.keys[idx] == keys)
+
+        acc = self.acc[param]
+        count = np.where(known[:, None, None], acc["count"][idx], 0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = acc["sum"][idx] / count
+        mean[count == 0] = np.nan
+        return mean
+
+    def save(self, path: str) -> None:
+        """Сохраняет аккумуляторы в .npz (для календарных частот — открытые группы)."""
+        if self.latitude is None:
+            raise ValueError("Nothing accumulated yet")
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        arrays = {
+            "freq": np.array(self.freq),
+            "chunk_size": np.array(self.chunk_size),
+            "out_dir": np.array(self.out_dir or ""),
+            "keys": self.keys,
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+            "last_time": np.array(self.last_time, dtype="datetime64[ns]"),
+            "params": np.array(list(self.acc)),
+        }
+        for param, acc in self.acc.items():
+            for name, arr in acc.items():
+                arrays[f"{param}__{name}"] = arr
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "TemporalAggregator":
+        """Загружает аккумуляторы, сохранённые через save()."""
+        with np.load(path) as data:
+            params = [str(p) for p in data["params"]]
+            agg = cls(
+                freq=str(data["freq"]),
+                params=params or None,
+                chunk_size=int(data["chunk_size"]),
+                out_dir=str(data["out_dir"]) or None,
+            )
+            agg.keys = data["keys"]
+            agg.latitude = data["latitude"]
+            agg.longitude = data["longitude"]
+            agg.last_time = data["last_time"][()]
+            for param in params:
+                agg.acc[param] = {
+                    name: data[f"{param}__{name}"]
+                    for name in ("sum", "count", "min", "max")
+                }
+        return agg
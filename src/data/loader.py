@@ -0,0 +1,131 @@
+import queue
+import threading
+from typing import Dict, Iterator, Optional, Sequence, Union
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from xarray import Dataset
+
+from src.utils.params import PARAMS
+
+
+def to_array(ds: Dataset, params: Optional[Sequence[str]] = None) -> np.ndarray:
+    """Единственная копия датасета: float32 (valid_time, param, lat, lon)."""
+    params = list(params or PARAMS)
+    cube = np.empty(
+        (
+            ds.sizes["valid_time"],
+            len(params),
+            ds.sizes["latitude"],
+            ds.sizes["longitude"],
+        ),
+        dtype=np.float32,
+    )
+    for i, param in enumerate(params):
+        cube[:, i] = ds[param].transpose("valid_time", "latitude", "longitude").values
+    return cube
+
+
+class WindowLoader:
+    """
+    Обучающие пары (окно входа, горизонт прогноза) по valid_time.
+
+    Окна — это strided view (sliding_window_view) поверх одного float32 массива,
+    поэтому память не растёт с длиной окна: копируется только текущий батч.
+    Следующий батч собирается в фоновом потоке, пока обрабатывается текущий.
+    """
+
+    def __init__(
+        self,
+        data: Union[Dataset, np.ndarray],
+        window: int,
+        horizon: int = 1,
+        batch_size: int = 32,
+        shuffle: bool = True,
+        fill_value: float = 0.0,
+        prefetch: int = 2,
+        seed: Optional[int] = None,
+        params: Optional[Sequence[str]] = None,
+    ):
+        self.data = (
+            to_array(data, params) if isinstance(data, Dataset) else np.asarray(data)
+        )
+        if self.data.dtype != np.float32:
+            raise ValueError("data must be a float32 (valid_time, ...) array")
+        if window < 1 or horizon < 1:
+            raise ValueError("window and horizon must be positive")
+        if self.data.shape[0] < window + horizon:
+            raise ValueError("Not enough valid_time frames for window and horizon")
+
+        self.window = window
+        self.horizon = horizon
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.fill_value = fill_value
+        self.prefetch = prefetch
+        self.rng = np.random.default_rng(seed)
+
+        # (sample, ..., window + horizon) — view без копирования
+        self.windows = sliding_window_view(self.data, window + horizon, axis=0)
+
+    def __len__(self) -> int:
+        return -(-self.windows.shape[0] // self.batch_size)
+
+    def _batch(self, idx: np.ndarray) -> Dict[str, np.ndarray]:
+        """Копирует только выбранные окна и переносит ось времени на место 1."""
+        batch = np.moveaxis(self.windows[idx], -1, 1)
+        x = batch[:, : self.window]
+        y = batch[:, self.window :]
+
+        x_mask = ~np.isnan(x)
+        y_mask = ~np.isnan(y)
+        # batch — уже собственная копия, заполняем NaN на месте
+        np.copyto(batch, self.fill_value, where=np.isnan(batch))
+
+        return {"x": x, "y": y, "x_mask": x_mask, "y_mask": y_mask, "index": idx}
+
+    def _indices(self) -> Iterator[np.ndarray]:
+        n = self.windows.shape[0]
+        order = self.rng.permutation(n) if self.shuffle else np.arange(n)
+        for start in range(0, n, self.batch_size):
+            # Сортировка внутри батча — последовательное чтение из памяти
+            yield np.sort(order[start : start + self.batch_size])
+
+    def __iter__(self) -> Iterator[Dict[str, np.ndarray]]:
+        if self.prefetch <= 0:
+            for idx in self._indices():
+                yield self._batch(idx)
+            return
+
+        batches: queue.Queue = queue.Queue(maxsize=self.prefetch)
+        stop = threading.Event()
+        done = object()
+
+        def worker():
+            try:
+                for idx in self._indices():
+                    if stop.is_set():
+                        return
+                    batches.put(self._batch(idx))
+                batches.put(done)
+            except Exception as e:
+                batches.put(e)
+
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = batches.get()
+                if item is done:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # Потребитель мог прервать цикл: освобождаем поток
+            stop.set()
+            while thread.is_alive():
+                try:
+                    batches.get_nowait()
+                except queue.Empty:
+                    thread.join(timeout=0.01)
@@ -0,0 +1,210 @@
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+from xarray import Dataset
+
+
+def _axis_index(coord: np.ndarray, points: np.ndarray, periodic: bool = False) -> Dict:
+    """
+    Дробные индексы точек на регулярной оси: (point - coord[0]) / step.
+    Работает и для убывающей оси (latitude в ERA5 идёт с 90 до -90).
+    """
+    n = coord.size
+    step = (coord[-1] - coord[0]) / (n - 1) if n > 1 else 1.0
+    if n > 2 and not np.allclose(np.diff(coord), step):
+        raise ValueError("Grid axis is not regular")
+
+    if periodic:
+        # Приводим долготы к диапазону сетки (0..360 или -180..180)
+        points = (points - coord[0]) % 360.0 + coord[0]
+
+    pos = (points - coord[0]) / step
+    if not periodic and np.any((pos < -1e-6) | (pos > n - 1 + 1e-6)):
+        raise ValueError("Some points are outside the grid")
+
+    return {"pos": pos, "n": n, "periodic": periodic}
+
+
+class PointIndex:
+    """
+    Отображение произвольных lat/lon станций на индексы регулярной сетки ERA5.
+    Индексы и веса считаются один раз, дальше выборка идёт одним векторным
+    gather по всем станциям и всем valid_time.
+    """
+
+    def __init__(
+        self,
+        ds: Dataset,
+        lats: Iterable[float],
+        lons: Iterable[float],
+        method: str = "nearest",
+        tile_size: int = 32,
+        max_window_bytes: int = 256 * 2**20,
+    ):
+        if method not in ["nearest", "bilinear"]:
+            raise ValueError("method must be 'nearest' or 'bilinear'")
+
+        self.method = method
+        self.tile_size = tile_size
+        self.max_window_bytes = max_window_bytes
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        if self.lats.shape != self.lons.shape or self.lats.ndim != 1:
+            raise ValueError("lats and lons must be 1D arrays of the same length")
+
+        lat_coord = ds["latitude"].values.astype(np.float64)
+        lon_coord = ds["longitude"].values.astype(np.float64)
+        # Глобальная сетка замыкается по долготе
+        step = abs(lon_coord[1] - lon_coord[0]) if lon_coord.size > 1 else 0.0
+        periodic = bool(np.isclose(lon_coord.size * step, 360.0))
+
+        lat_ax = _axis_index(lat_coord, self.lats)
+        lon_ax = _axis_index(lon_coord, self.lons, periodic=periodic)
+
+        if method == "nearest":
+            i_lat = np.clip(np.rint(lat_ax["pos"]).astype(np.int64), 0, lat_ax["n"] - 1)
+            i_lon = np.rint(lon_ax["pos"]).astype(np.int64)
+            i_lon = (
+                i_lon % lon_ax["n"] if periodic else np.clip(i_lon, 0, lon_ax["n"] - 1)
+            )
+            # (станция, угол) — для nearest один «угол» с весом 1
+            self.i_lat = i_lat[:, None]
+            self.i_lon = i_lon[:, None]
+            self.weights = np.ones((self.lats.size, 1))
+        else:
+            lat0 = np.clip(np.floor(lat_ax["pos"]), 0, max(lat_ax["n"] - 2, 0))
+            lon0 = np.floor(lon_ax["pos"])
+            if not periodic:
+                lon0 = np.clip(lon0, 0, max(lon_ax["n"] - 2, 0))
+            t_lat = lat_ax["pos"] - lat0
+            t_lon = lon_ax["pos"] - lon0
+
+            lat0 = lat0.astype(np.int64)
+            lon0 = lon0.astype(np.int64)
+            lat1 = np.minimum(lat0 + 1, lat_ax["n"] - 1)
+            lon1 = (
+                (lon0 + 1) % lon_ax["n"]
+                if periodic
+                else np.minimum(lon0 + 1, lon_ax["n"] - 1)
+            )
+            lon0 = lon0 % lon_ax["n"]
+
+            self.i_lat = np.stack([lat0, lat0, lat1, lat1], axis=1)
+            self.i_lon = np.stack([lon0, lon1, lon0, lon1], axis=1)
+            self.weights = np.stack(
+                [
+                    (1 - t_lat) * (1 - t_lon),
+                    (1 - t_lat) * t_lon,
+                    t_lat * (1 - t_lon),
+                    t_lat * t_lon,
+                ],
+                axis=1,
+            )
+
+        self.n_lon = lon_ax["n"]
+        # Одно окно сетки, накрывающее все станции (для станций по всему
+        # глобусу — весь слой); тайлы строятся только при нехватке памяти
+        self.window = self._group(np.arange(self.lats.size))
+        self._tiles: Optional[List[Dict]] = None
+
+    def _group(self, stations: np.ndarray) -> Dict:
+        """Станции и непрерывное окно сетки, которое их накрывает."""
+        i_lat = self.i_lat[stations]
+        i_lon = self.i_lon[stations]
+        if stations.size == 0:
+            lat0 = lat1 = lon0 = lon1 = 0
+        else:
+            lat0, lat1 = int(i_lat.min()), int(i_lat.max()) + 1
+            lon0, lon1 = int(i_lon.min()), int(i_lon.max()) + 1
+        return {
+            "stations": stations,
+            "latitude": slice(lat0, lat1),
+            "longitude": slice(lon0, lon1),
+            "inv_lat": i_lat - lat0,
+            "inv_lon": i_lon - lon0,
+            "weights": self.weights[stations],
+        }
+
+    @property
+    def tiles(self) -> List[Dict]:
+        """Группы станций по тайлам tile_size x tile_size ячеек сетки."""
+        if self._tiles is None:
+            n_tiles_lon = self.n_lon // self.tile_size + 1
+            tile_keys = (self.i_lat[:, 0] // self.tile_size) * n_tiles_lon + (
+                self.i_lon[:, 0] // self.tile_size
+            )
+            self._tiles = [
+                self._group(np.flatnonzero(tile_keys == key))
+                for key in np.unique(tile_keys)
+            ]
+        return self._tiles
+
+    @staticmethod
+    def _gather(block: np.ndarray, group: Dict) -> np.ndarray:
+        """Окно (time, lat, lon) -> (time, station), веса по не-NaN."""
+        # (time, station, corner)
+        corners = block[:, group["inv_lat"], group["inv_lon"]]
+        valid = ~np.isnan(corners)
+        weights = np.where(valid, group["weights"], 0.0)
+        weight_sum = weights.sum(axis=-1)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            values = (np.where(valid, corners, 0.0) * weights).sum(axis=-1) / weight_sum
+        values[weight_sum == 0] = np.nan
+
+        return values
+
+    def extract(
+        self,
+        ds: Dataset,
+        params: Union[str, Iterable[str], None] = None,
+        frame: Union[int, slice, None] = None,
+        chunk_size: Optional[int] = 24,
+    ) -> Dict:
+        """
+        Временные ряды во всех станциях: {param: (valid_time, station)}.
+        Для каждого чанка valid_time читается одно непрерывное окно сетки
+        и все станции выбираются одним векторным gather. Если окно чанка
+        больше max_window_bytes, чтение идёт по окнам тайлов.
+        """
+        if params is None:
+            params = [p for p in ds.data_vars if "valid_time" in ds[p].sizes]
+        elif isinstance(params, str):
+            params = [params]
+
+        if frame is not None:
+            ds = ds.isel(valid_time=[frame] if isinstance(frame, int) else frame)
+
+        n_time = ds.sizes["valid_time"]
+        chunk_size = chunk_size or n_time
+
+        result = {
+            "valid_time": ds["valid_time"].values,
+            "latitude": self.lats,
+            "longitude": self.lons,
+        }
+        for param in params:
+            arr = ds[param].transpose("valid_time", "latitude", "longitude")
+            window_bytes = (
+                min(chunk_size, n_time)
+                * (self.window["latitude"].stop - self.window["latitude"].start)
+                * (self.window["longitude"].stop - self.window["longitude"].start)
+                * arr.dtype.itemsize
+            )
+            groups = (
+                [self.window] if window_bytes <= self.max_window_bytes else self.tiles
+            )
+
+            out = np.empty((n_time, self.lats.size), dtype=np.float64)
+            for start in range(0, n_time, chunk_size):
+                times = slice(start, start + chunk_size)
+                for group in groups:
+                    block = arr.isel(
+                        valid_time=times,
+                        latitude=group["latitude"],
+                        longitude=group["longitude"],
+                    ).values
+                    out[times, group["stations"]] = self._gather(block, group)
+            result[param] = out
+
+        return result
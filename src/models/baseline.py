@@ -0,0 +1,254 @@
+from typing import Dict, Iterable, Optional, Sequence, Union
+
+import numpy as np
+from xarray import Dataset
+
+from src.data.aggregate import TemporalAggregator, group_keys
+from src.utils.params import PARAMS
+
+
+def _frames(init: Union[int, Sequence[int]]) -> np.ndarray:
+    return np.atleast_1d(np.asarray(init, dtype=np.int64))
+
+
+def _stack(ds: Dataset, params: Sequence[str], frames) -> np.ndarray:
+    """Поля params в кадрах frames как float32 (time, param, lat, lon)."""
+    return np.stack(
+        [
+            ds[p]
+            .isel(valid_time=frames)
+            .transpose("valid_time", "latitude", "longitude")
+            .values.astype(np.float32)
+            for p in params
+        ],
+        axis=1,
+    )
+
+
+def _target_times(ds: Dataset, init: np.ndarray, lead: int) -> np.ndarray:
+    return ds["valid_time"].values[init] + np.timedelta64(lead, "h")
+
+
+class Persistence:
+    """Прогноз «завтра как сегодня»: поле в момент init для любой заблаговременности."""
+
+    def __init__(self, params: Optional[Iterable[str]] = None):
+        self.params = list(params or PARAMS)
+
+    def fit(self, ds: Dataset) -> "Persistence":
+        return self
+
+    def predict(
+        self, ds: Dataset, init: Union[int, Sequence[int]], lead: int
+    ) -> Dict[str, np.ndarray]:
+        """{param: (init, lat, lon)} на момент valid_time[init] + lead часов."""
+        fields = _stack(ds, self.params, _frames(init))
+        return {p: fields[:, i] for i, p in enumerate(self.params)}
+
+
+class HourlyClimatology:
+    """Прогноз средним полем для часа суток момента valid_time[init] + lead."""
+
+    def __init__(self, params: Optional[Iterable[str]] = None, chunk_size: int = 24):
+        self.params = list(params or PARAMS)
+        self.aggregator = TemporalAggregator(
+            "diurnal", params=self.params, chunk_size=chunk_size
+        )
+
+    def fit(self, ds: Dataset) -> "HourlyClimatology":
+        # Повторный fit на расширенном архиве досчитывает только новые кадры
+        self.aggregator.update(ds)
+        self.means = {
+            p: self.aggregator.result(p)["mean"].astype(np.float32) for p in self.params
+        }
+        return self
+
+    def predict(
+        self, ds: Dataset, init: Union[int, Sequence[int]], lead: int
+    ) -> Dict[str, np.ndarray]:
+        hours = group_keys(_target_times(ds, _frames(init), lead), "diurnal")
+        return {p: self.means[p][hours] for p in self.params}
+
+
+class RidgeAR:
+    """
+    Авторегрессия по ячейкам сетки: прогноз всех переменных на lead часов
+    вперёд по lags последним полям всех переменных в той же ячейке.
+
+    Обучение — ridge-регрессия в замкнутой форме: нормальные уравнения
+    X^T X и X^T Y копятся по чанкам времени сразу для всех ячеек
+    (батчевый matmul), затем решаются одним батчевым np.linalg.solve.
+    NaN (sst над сушей) в признаках и целях заменяются средним.
+    """
+
+    def __init__(
+        self,
+        params: Optional[Iterable[str]] = None,
+        lags: int = 2,
+        lead: int = 1,
+        alpha: float = 1.0,
+        chunk_size: int = 24,
+        cell_block: int = 65536,
+    ):
+        self.params = list(params or PARAMS)
+        self.lags = lags
+        self.lead = lead
+        self.alpha = alpha
+        self.chunk_size = chunk_size
+        self.cell_block = cell_block
+
+        self.coef: Optional[np.ndarray] = None  # (cells, features, params)
+
+    @property
+    def n_features(self) -> int:
+        return self.lags * len(self.params) + 1
+
+    def _normalize(self, fields: np.ndarray) -> np.ndarray:
+        """
+        (time, param, lat, lon) -> (time, param, cells): стандартизация
+        по переменным, NaN -> 0 (т.е. среднее).
+        """
+        fields = fields.reshape(fields.shape[0], fields.shape[1], -1)
+        fields = (fields - self.mean[:, None]) / self.std[:, None]
+        return np.nan_to_num(fields, nan=0.0, copy=False)
+
+    def _features(self, history: np.ndarray) -> np.ndarray:
+        """
+        history: (n + lags - 1, param, cells) нормированных полей ->
+        (cells, n, features), где признаки — lags последних полей и 1.
+        """
+        n = history.shape[0] - self.lags + 1
+        n_cells = history.shape[-1]
+        lagged = [
+            history[self.lags - 1 - lag : self.lags - 1 - lag + n]
+            for lag in range(self.lags)
+        ]
+        X = np.empty((n_cells, n, self.n_features), dtype=np.float64)
+        X[..., :-1] = np.concatenate(lagged, axis=1).transpose(2, 0, 1)
+        X[..., -1] = 1.0
+        return X
+
+    def _moments(self, ds: Dataset) -> None:
+        """
+        Среднее и std по переменным за один проход чанками по valid_time:
+        count, сумма и сумма квадратов во float64 (без NaN).
+        """
+        n_params = len(self.params)
+        count = np.zeros(n_params)
+        total = np.zeros(n_params)
+        total_sq = np.zeros(n_params)
+        n_time = ds.sizes["valid_time"]
+        for start in range(0, n_time, self.chunk_size):
+            fields = _stack(
+                ds, self.params, np.arange(start, min(start + self.chunk_size, n_time))
+            )
+            fields = fields.transpose(1, 0, 2, 3).reshape(n_params, -1)
+            valid = ~np.isnan(fields)
+            values = np.where(valid, fields, 0.0).astype(np.float64)
+            count += valid.sum(axis=1)
+            total += values.sum(axis=1)
+            total_sq += (values * values).sum(axis=1)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = total / count
+            var = np.maximum(total_sq / count - mean * mean, 0.0)
+        std = np.sqrt(var)
+        self.mean = mean.astype(np.float32)
+        self.std = np.where(std > 0, std, 1.0).astype(np.float32)
+
+    def fit(self, ds: Dataset) -> "RidgeAR":
+        n_time = ds.sizes["valid_time"]
+        n_cells = ds.sizes["latitude"] * ds.sizes["longitude"]
+        self.shape = (ds.sizes["latitude"], ds.sizes["longitude"])
+
+        # Масштабы переменных (sp ~ 1e5, tp ~ 1e-3) выравниваем до обучения
+        self._moments(ds)
+
+        k = self.n_features
+        # Накопители во float64: ошибки округления в нормальных уравнениях
+        # накапливаются за годы данных при почти коллинеарных лагах
+        xtx = np.zeros((n_cells, k, k))
+        xty = np.zeros((n_cells, k, len(self.params)))
+
+        # Первый момент, для которого есть все lags: lags - 1
+        first = self.lags - 1
+        last = n_time - self.lead  # не включительно
+        if last <= first:
+            raise ValueError("Not enough valid_time frames for lags and lead")
+
+        for start in range(first, last, self.chunk_size):
+            stop = min(start + self.chunk_size, last)
+            inputs = self._normalize(
+                _stack(ds, self.params, np.arange(start - first, stop))
+            )
+            targets = self._normalize(
+                _stack(ds, self.params, np.arange(start, stop) + self.lead)
+            )
+
+            for c0 in range(0, n_cells, self.cell_block):
+                cells = slice(c0, c0 + self.cell_block)
+                X = self._features(inputs[..., cells])  # (cells, n, k)
+                Y = targets[..., cells].transpose(2, 0, 1)  # (cells, n, params)
+                Xt = X.transpose(0, 2, 1)
+                xtx[cells] += Xt @ X
+                xty[cells] += Xt @ Y
+
+        # Свободный член почти не штрафуем
+        penalty = np.full(k, self.alpha)
+        penalty[-1] = 1e-8
+        # Решение по блокам ячеек: временные массивы solve не больше cell_block
+        self.coef = np.empty((n_cells, k, len(self.params)), dtype=np.float32)
+        for c0 in range(0, n_cells, self.cell_block):
+            cells = slice(c0, c0 + self.cell_block)
+            A = xtx[cells].copy()
+            A[:, np.arange(k), np.arange(k)] += penalty
+            self.coef[cells] = np.linalg.solve(A, xty[cells])
+
+        return self
+
+    def _step(self, history: np.ndarray) -> np.ndarray:
+        """Один шаг lead по последним lags нормированным полям."""
+        n_cells = history.shape[-1]
+        out = np.empty((len(self.params), n_cells), dtype=np.float32)
+        for c0 in range(0, n_cells, self.cell_block):
+            cells = slice(c0, c0 + self.cell_block)
+            X = self._features(history[..., cells])  # (cells, 1, k)
+            out[:, cells] = (X @ self.coef[cells])[:, 0].T
+        return out
+
+    def predict(
+        self, ds: Dataset, init: Union[int, Sequence[int]], lead: int
+    ) -> Dict[str, np.ndarray]:
+        """
+        Прогноз на lead часов; при lead, кратном self.lead, модель
+        применяется итеративно к собственным прогнозам.
+        """
+        if self.coef is None:
+            raise ValueError("Model is not fitted")
+        if lead <= 0 or lead % self.lead != 0:
+            raise ValueError(f"lead must be a positive multiple of {self.lead}")
+
+        frames = _frames(init)
+        if frames.min() < self.lags - 1:
+            raise ValueError(f"init must be >= {self.lags - 1} to build lags")
+
+        n_cells = self.shape[0] * self.shape[1]
+        n_params = len(self.params)
+        result = np.empty((frames.size, n_params, n_cells), dtype=np.float32)
+
+        for i, frame in enumerate(frames):
+            raw = _stack(ds, self.params, np.arange(frame - self.lags + 1, frame + 1))
+            # Суша для sst и т.п.: где поле NaN в момент init, прогноз NaN
+            land = np.isnan(raw[-1]).reshape(n_params, n_cells)
+            history = self._normalize(raw)
+
+            for _ in range(lead // self.lead):
+                step = self._step(history)
+                history = np.concatenate([history[1:], step[None]], axis=0)
+
+            pred = history[-1] * self.std[:, None] + self.mean[:, None]
+            pred[land] = np.nan
+            result[i] = pred
+
+        result = result.reshape((frames.size, n_params) + self.shape)
+        return {p: result[:, j] for j, p in enumerate(self.params)}
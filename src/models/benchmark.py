@@ -0,0 +1,80 @@
+"""
+Бенчмарк пропускной способности базовых моделей (ячеек сетки в секунду, CPU).
+
+python3 -m src.models.benchmark --n_lat=181 --n_lon=360 --n_time=168
+"""
+
+import argparse
+import time
+
+import numpy as np
+import xarray as xr
+
+from src.models.baseline import HourlyClimatology, Persistence, RidgeAR
+from src.utils.params import PARAMS
+
+
+def synthetic_dataset(n_time: int, n_lat: int, n_lon: int, seed: int = 0):
+    """Синтетический датасет в формате ERA5 (valid_time, latitude, longitude)."""
+    rng = np.random.default_rng(seed)
+    valid_time = np.datetime64("2025-12-01T00", "ns") + np.arange(
+        n_time
+    ) * np.timedelta64(1, "h")
+    latitude = np.linspace(90, -90, n_lat)
+    longitude = np.linspace(0, 360, n_lon, endpoint=False)
+
+    hours = np.arange(n_time)[:, None, None]
+    data_vars = {}
+    for i, param in enumerate(PARAMS):
+        field = np.sin(2 * np.pi * (hours + i) / 24) + rng.normal(
+            scale=0.3, size=(n_time, n_lat, n_lon)
+        )
+        data_vars[param] = (
+            ("valid_time", "latitude", "longitude"),
+            field.astype(np.float32),
+        )
+
+    return xr.Dataset(
+        data_vars,
+        coords={"valid_time": valid_time, "latitude": latitude, "longitude": longitude},
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Baseline models benchmark")
+    parser.add_argument("--n_time", type=int, default=168)
+    parser.add_argument("--n_lat", type=int, default=181)
+    parser.add_argument("--n_lon", type=int, default=360)
+    parser.add_argument("--lags", type=int, default=2)
+    parser.add_argument("--lead", type=int, default=1)
+    parser.add_argument("--n_init", type=int, default=8)
+    args = parser.parse_args()
+
+    ds = synthetic_dataset(args.n_time, args.n_lat, args.n_lon)
+    n_cells = args.n_lat * args.n_lon
+    init = np.arange(args.n_time - args.n_init, args.n_time)
+
+    models = {
+        "persistence": Persistence(),
+        "hourly_climatology": HourlyClimatology(),
+        "ridge_ar": RidgeAR(lags=args.lags, lead=args.lead),
+    }
+
+    print(f"Grid: {args.n_lat}x{args.n_lon} ({n_cells} cells), {args.n_time} frames")
+    for name, model in models.items():
+        t0 = time.perf_counter()
+        model.fit(ds)
+        t1 = time.perf_counter()
+        model.predict(ds, init, args.lead)
+        t2 = time.perf_counter()
+
+        fit_rate = n_cells / (t1 - t0) if t1 > t0 else float("inf")
+        predict_rate = n_cells * init.size / (t2 - t1)
+        print(
+            f"{name:>20}: fit {t1 - t0:.2f} s ({fit_rate:,.0f} cells/s), "
+            f"predict {t2 - t1:.2f} s ({predict_rate:,.0f} cells/s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
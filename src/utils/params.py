@@ -1,14 +1,24 @@
-from typing import Dict, Union
+from typing import Dict, Optional, Union
 
 import numpy as np
 from xarray import Dataset
 
+from src.utils.subset import Subset
+
+# Переменные ERA5, которые скачивает src/data/download.py
+PARAMS = ["u10", "v10", "t2m", "sst", "sp", "skt", "tp"]
+
 
 def get_param(
     ds: Dataset,
     param: str,
     frame: Union[int, slice, None] = None,
+    subset: Optional[Subset] = None,
 ) -> Dict:
+    # frame считается внутри выборки subset
+    if subset is not None:
+        ds = subset.apply(ds)
+
     if param in ds.coords:
         data = ds[param]
         if data.ndim > 1:
@@ -0,0 +1,160 @@
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+from xarray import Dataset
+
+
+def _index_slice(mask: np.ndarray, name: str) -> slice:
+    """Непрерывный диапазон индексов, где mask истинна (координаты монотонны)."""
+    indices = np.flatnonzero(mask)
+    if indices.size == 0:
+        raise ValueError(f"Subset does not intersect {name}")
+    return slice(int(indices[0]), int(indices[-1]) + 1)
+
+
+class Subset:
+    """
+    Пространственно-временная выборка: bbox в порядке download.py
+    (north, west, south, east), интервал valid_time (включительно) и список
+    переменных. Разрешается в срезы индексов по координатам до чтения данных,
+    поэтому из файла читаются только нужные тайлы.
+    """
+
+    def __init__(
+        self,
+        north: Optional[float] = None,
+        west: Optional[float] = None,
+        south: Optional[float] = None,
+        east: Optional[float] = None,
+        start: Union[str, np.datetime64, None] = None,
+        end: Union[str, np.datetime64, None] = None,
+        params: Optional[Sequence[str]] = None,
+    ):
+        if (west is None) != (east is None):
+            raise ValueError("west and east must be given together")
+        if north is not None and south is not None and south > north:
+            raise ValueError("south must not be greater than north")
+
+        self.north = north
+        self.west = west
+        self.south = south
+        self.east = east
+        self.start = np.datetime64(start, "ns") if start is not None else None
+        self.end = np.datetime64(end, "ns") if end is not None else None
+        self.params = list(params) if params is not None else None
+
+    @property
+    def has_bbox(self) -> bool:
+        return any(
+            v is not None for v in [self.north, self.south, self.west, self.east]
+        )
+
+    @property
+    def key(self) -> str:
+        """Отпечаток выборки для ключей кеша: bbox, интервал времени, переменные."""
+        return repr(
+            (
+                self.north,
+                self.west,
+                self.south,
+                self.east,
+                str(self.start),
+                str(self.end),
+                self.params,
+            )
+        )
+
+    def extent(self, ds: Dataset) -> List[float]:
+        """
+        [west, east, south, north] для ax.set_extent (границы сетки по
+        умолчанию). east приводится к east > west, чтобы bbox через шов
+        (west=170, east=-170) давал 170..190, а не дополнение региона.
+        """
+        lat = ds["latitude"].values
+        lon = ds["longitude"].values
+        if self.west is not None:
+            west = self.west
+            span = self.east - self.west
+            east = west + (span if span >= 360.0 else span % 360.0)
+        else:
+            west, east = float(lon.min()), float(lon.max())
+        return [
+            west,
+            east,
+            self.south if self.south is not None else float(lat.min()),
+            self.north if self.north is not None else float(lat.max()),
+        ]
+
+    def slices(self, ds: Dataset) -> Dict[str, Union[slice, List[slice]]]:
+        """
+        Срезы индексов по valid_time, latitude и longitude. Если bbox
+        пересекает шов долготной сетки, по longitude возвращаются два среза.
+        """
+        slices: Dict[str, Union[slice, List[slice]]] = {}
+
+        if self.start is not None or self.end is not None:
+            times = ds["valid_time"].values
+            mask = np.ones(times.size, dtype=bool)
+            if self.start is not None:
+                mask &= times >= self.start
+            if self.end is not None:
+                mask &= times <= self.end
+            slices["valid_time"] = _index_slice(mask, "valid_time")
+
+        if self.north is not None or self.south is not None:
+            lat = ds["latitude"].values
+            mask = np.ones(lat.size, dtype=bool)
+            if self.north is not None:
+                mask &= lat <= self.north
+            if self.south is not None:
+                mask &= lat >= self.south
+            slices["latitude"] = _index_slice(mask, "latitude")
+
+        if self.west is not None:
+            lon = ds["longitude"].values
+            lon0 = float(lon.min())
+            # Приводим bbox к соглашению сетки (0..360 или -180..180)
+            west = (self.west - lon0) % 360.0 + lon0
+            east = (self.east - lon0) % 360.0 + lon0
+            if self.east - self.west >= 360.0:
+                slices["longitude"] = slice(None)
+            elif west <= east:
+                mask = (lon >= west) & (lon <= east)
+                slices["longitude"] = _index_slice(mask, "longitude")
+            else:
+                slices["longitude"] = [
+                    _index_slice(lon >= west, "longitude"),
+                    _index_slice(lon <= east, "longitude"),
+                ]
+
+        return slices
+
+    def apply(self, ds: Dataset) -> Dataset:
+        """
+        Ленивая выборка ds по индексам: данные читаются только при обращении
+        к .values. bbox через шов сетки выбирается одним целочисленным
+        индексом по longitude, западная часть сдвигается на -360.
+        """
+        if self.params is not None:
+            ds = ds[self.params]
+
+        slices = self.slices(ds)
+        lon_slices = slices.pop("longitude", None)
+        n_west = 0
+        if isinstance(lon_slices, list):
+            indices = np.arange(ds.sizes["longitude"])
+            west_indices = indices[lon_slices[0]]
+            n_west = west_indices.size
+            slices["longitude"] = np.r_[west_indices, indices[lon_slices[1]]]
+        elif lon_slices is not None:
+            slices["longitude"] = lon_slices
+
+        ds = ds.isel(slices)
+
+        if n_west:
+            # Долгота должна возрастать: западная часть 170..180 -> -190..-180
+            lon = ds["longitude"].values.copy()
+            lon[:n_west] -= 360.0
+            ds = ds.assign_coords(longitude=ds["longitude"].copy(data=lon))
+
+        return ds
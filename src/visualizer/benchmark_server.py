@@ -0,0 +1,90 @@
+"""
+Бенчмарк задержки и пропускной способности сервиса рендера.
+
+По умолчанию поднимает сервис в процессе на синтетическом датасете;
+с --url меряет уже запущенный сервис (python3 -m src.visualizer.server).
+
+python3 -m src.visualizer.benchmark_server --requests=200 --concurrency=8
+"""
+
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+from urllib.request import urlopen
+
+import numpy as np
+
+from src.models.benchmark import synthetic_dataset
+from src.visualizer.server import FrameCache, RenderService, make_server
+
+
+def fetch(url: str) -> float:
+    t0 = time.perf_counter()
+    with urlopen(url) as response:
+        response.read()
+    return time.perf_counter() - t0
+
+
+def report(name: str, latencies: List[float], elapsed: float) -> None:
+    ms = np.array(latencies) * 1000
+    print(
+        f"{name:>10}: {len(ms)} req, {len(ms) / elapsed:.1f} req/s, "
+        f"p50 {np.percentile(ms, 50):.1f} ms, p95 {np.percentile(ms, 95):.1f} ms, "
+        f"max {ms.max():.1f} ms"
+    )
+
+
+def run(urls: List[str], concurrency: int) -> tuple:
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(fetch, urls))
+    return latencies, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render service benchmark")
+    parser.add_argument("--url", type=str, default=None)
+    parser.add_argument("--vis_type", type=str, default="kde1d")
+    parser.add_argument("--param", type=str, default="t2m")
+    parser.add_argument("--frames", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--n_time", type=int, default=24)
+    parser.add_argument("--n_lat", type=int, default=181)
+    parser.add_argument("--n_lon", type=int, default=360)
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        ds = synthetic_dataset(args.n_time, args.n_lat, args.n_lon)
+        service = RenderService(ds, FrameCache())
+        server = make_server(service, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_port}"
+
+    frame_urls = [
+        f"{url}/{args.vis_type}/{args.param}/{frame}" for frame in range(args.frames)
+    ]
+
+    # Холодный рендер: каждый кадр впервые
+    report("cold", *run(frame_urls, 1))
+
+    # Объединение: одинаковый новый запрос одновременно от всех клиентов
+    coalesce_url = f"{url}/{args.vis_type}/{args.param}/{args.frames}?dpi=72"
+    report("coalesced", *run([coalesce_url] * args.concurrency, args.concurrency))
+
+    # Тёплый кеш: повторные запросы тех же кадров
+    rng = np.random.default_rng(0)
+    warm_urls = [frame_urls[i] for i in rng.integers(0, args.frames, args.requests)]
+    report("warm", *run(warm_urls, args.concurrency))
+
+    if server is not None:
+        print(f"Service stats: {service.stats}")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
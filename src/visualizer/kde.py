@@ -1,10 +1,11 @@
-from typing import Dict, Tuple, Union
+from typing import Dict, Optional, Tuple, Union
 
 import numpy as np
 from scipy.ndimage import gaussian_filter, gaussian_filter1d
 from xarray import Dataset
 
 from src.utils.params import get_param
+from src.utils.subset import Subset
 
 
 def kde1d(
@@ -13,7 +14,11 @@ def kde1d(
     frame: Union[int, slice, None] = None,
     bins: int = 100,
     smooth_sigma: float = 1.0,
+    subset: Optional[Subset] = None,
 ) -> Dict:
+    if subset is not None:
+        ds = subset.apply(ds)
+
     values_clean = get_param(ds, param, frame)["values_clean"]
 
     if param in ["t2m", "sst", "skt"]:
@@ -67,7 +72,12 @@ def kde2d(
     bins_y: Union[int, Tuple[int, int]] = 100,
     smooth_sigma: float = 1.0,
     frame: Union[int, slice, None] = None,
+    subset: Optional[Subset] = None,
 ) -> Dict:
+    # Выборка один раз для всех get_param ниже
+    if subset is not None:
+        ds = subset.apply(ds)
+
     # Получаем данные для Y (основной параметр)
     y_data = get_param(ds, param_y, frame)
     p_y_clean = y_data["values_clean"]
@@ -99,10 +109,11 @@ def kde2d(
         bins_x = len(np.unique(hours))
     elif param_x == "latitude":
         p_x_full = np.tile(np.repeat(lat_data["values"], n_lon), n_time)
-        bins_x = n_lat // 10
+        # Для небольших регионов (subset) — не меньше min(n_lat, 10) бинов
+        bins_x = max(n_lat // 10, min(n_lat, 10))
     elif param_x == "longitude":
         p_x_full = np.tile(lon_data["values"], n_time * n_lat)
-        bins_x = n_lon // 10
+        bins_x = max(n_lon // 10, min(n_lon, 10))
     else:
         raise ValueError("param_x must be 'valid_time', 'latitude' or 'longitude'")
 
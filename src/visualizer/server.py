@@ -0,0 +1,412 @@
+"""
+Локальный HTTP сервис рендера кадров по запросу.
+
+python3 -m src.visualizer.server --port=8050
+
+GET /map/<param>/<frame>
+GET /kde1d/<param>/<frame>
+GET /kde2d/<param_y>/<param_x>[?frame=<frame>]
+
+Необязательные query-параметры: cmap, title, units, units_x, bins,
+smooth_sigma, dpi. Ответ — image/png; неверные параметры — 400, dpi
+ограничивается DPI_RANGE.
+"""
+
+import argparse
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+from xarray import Dataset  # noqa: E402
+
+from src.utils.subset import Subset  # noqa: E402
+from src.visualizer.visualizer import Visualizer  # noqa: E402
+
+# Значения по умолчанию, как в src/data/visualize_animations.py
+DEFAULTS = {
+    "u10": {"cmap": "coolwarm", "title": "10m U Wind", "units": "m/s"},
+    "v10": {"cmap": "coolwarm", "title": "10m V Wind", "units": "m/s"},
+    "t2m": {"cmap": "coolwarm", "title": "2m Temperature", "units": "C"},
+    "sst": {"cmap": "coolwarm", "title": "Sea Surface Temperature", "units": "C"},
+    "sp": {"cmap": "viridis", "title": "Surface Pressure", "units": "mm Hg"},
+    "skt": {"cmap": "coolwarm", "title": "Skin Temperature", "units": "C"},
+    "tp": {"cmap": "Blues", "title": "Total Precipitation", "units": "mm"},
+}
+
+UNITS_X = {"valid_time": "Hours", "latitude": "Lat", "longitude": "Long"}
+
+# Границы параметров запроса: фигура map 20x12 дюймов при dpi=200 — 4000x2400
+DPI_RANGE = (20, 200)
+MAX_BINS = 1000
+
+
+class FrameCache:
+    """
+    LRU кеш отрендеренных изображений: в памяти (max_bytes) и на диске
+    (max_disk_bytes, порядок вытеснения — по времени последнего доступа).
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 256 * 2**20,
+        cache_dir: Optional[str] = None,
+        max_disk_bytes: int = 2 * 2**30,
+    ):
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            entries = [e for e in os.scandir(cache_dir) if e.name.endswith(".png")]
+            for entry in sorted(entries, key=lambda e: e.stat().st_mtime):
+                self._disk[entry.name] = entry.stat().st_size
+                self._disk_bytes += entry.stat().st_size
+
+    @staticmethod
+    def _file_name(key: str) -> str:
+        return hashlib.sha1(key.encode()).hexdigest() + ".png"
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                return data
+
+            if self.cache_dir is None:
+                return None
+            name = self._file_name(key)
+            if name not in self._disk:
+                return None
+            self._disk.move_to_end(name)
+
+        path = os.path.join(self.cache_dir, name)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+
+        self._put_memory(key, data)
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        self._put_memory(key, data)
+        if self.cache_dir is None:
+            return
+
+        name = self._file_name(key)
+        path = os.path.join(self.cache_dir, name)
+        # Атомарная запись: читатели не увидят недописанный файл
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        evicted = []
+        with self._lock:
+            self._disk_bytes += len(data) - self._disk.pop(name, 0)
+            self._disk[name] = len(data)
+            while self._disk_bytes > self.max_disk_bytes and len(self._disk) > 1:
+                old_name, size = self._disk.popitem(last=False)
+                self._disk_bytes -= size
+                evicted.append(old_name)
+
+        for old_name in evicted:
+            try:
+                os.remove(os.path.join(self.cache_dir, old_name))
+            except FileNotFoundError:
+                pass
+
+    def _put_memory(self, key: str, data: bytes) -> None:
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_bytes -= len(old)
+            self._memory[key] = data
+            self._memory_bytes += len(data)
+            while self._memory_bytes > self.max_bytes and len(self._memory) > 1:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+
+class RenderService:
+    """
+    Рендер кадров Visualizer по запросу: тёплый датасет и фигуры, LRU кеш
+    и объединение одинаковых одновременных запросов в один рендер.
+    """
+
+    def __init__(
+        self,
+        ds: Dataset,
+        cache: Optional[FrameCache] = None,
+        subset: Optional[Subset] = None,
+    ):
+        self.visualizer = Visualizer(
+            ds, save_frames=False, verbose=False, subset=subset
+        )
+        self.subset = subset
+        self.cache = cache or FrameCache()
+        self.n_frames = self.visualizer.ds.sizes["valid_time"]
+        self.fingerprint = self._fingerprint(ds, self.visualizer.ds, subset)
+
+        # matplotlib не потокобезопасен — рендер строго по одному
+        self._render_lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.stats = {"hits": 0, "renders": 0, "coalesced": 0}
+
+    @staticmethod
+    def _fingerprint(
+        source: Dataset, ds: Dataset, subset: Optional[Subset] = None
+    ) -> str:
+        """
+        Идентификатор данных для дискового кеша, который переживает процесс:
+        файл-источник, выборка (bbox, интервал, переменные), сетка,
+        диапазон valid_time и переменные.
+        """
+        lat = ds["latitude"].values
+        lon = ds["longitude"].values
+        times = ds["valid_time"].values
+        path = source.encoding.get("source")
+        parts = [
+            path,
+            os.path.getmtime(path) if path and os.path.exists(path) else None,
+            subset.key if subset is not None else None,
+            lat.size,
+            lat[0],
+            lat[-1],
+            lon.size,
+            lon[0],
+            lon[-1],
+            times.size,
+            str(times[0]),
+            str(times[-1]),
+            sorted(ds.data_vars),
+        ]
+        return hashlib.sha1(repr(parts).encode()).hexdigest()[:16]
+
+    def make_key(self, options: Dict) -> str:
+        """Ключ кеша: опции рендера, valid_time кадра и идентификатор данных."""
+        frame = options["frame"]
+        items = {
+            **options,
+            "valid_time": (
+                str(self.visualizer.ds["valid_time"].values[frame])
+                if frame is not None
+                else "all"
+            ),
+            "data": self.fingerprint,
+        }
+        return "&".join(f"{k}={items[k]}" for k in sorted(items))
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def options(
+        self, vis_type: str, path: list, query: Dict[str, str]
+    ) -> Dict[str, object]:
+        """Разбор запроса в аргументы Visualizer.render_frame."""
+        if vis_type in ["map", "kde1d"]:
+            if len(path) != 2:
+                raise ValueError(f"expected /{vis_type}/<param>/<frame>")
+            param, frame = path[0], int(path[1])
+            param_x = None
+        elif vis_type == "kde2d":
+            if len(path) != 2:
+                raise ValueError("expected /kde2d/<param_y>/<param_x>")
+            param, param_x = path
+            if param_x not in UNITS_X:
+                raise ValueError(
+                    "param_x must be 'valid_time', 'latitude' or 'longitude'"
+                )
+            frame = int(query["frame"]) if "frame" in query else None
+        else:
+            raise KeyError(vis_type)
+
+        if param not in self.visualizer.params:
+            raise KeyError(param)
+        if frame is not None and not 0 <= frame < self.n_frames:
+            raise KeyError(f"frame {frame}")
+
+        defaults = DEFAULTS.get(param, {})
+        cmap = query.get("cmap", defaults.get("cmap", "viridis"))
+        if cmap not in matplotlib.colormaps:
+            raise ValueError(f"unknown cmap {cmap!r}")
+        bins = int(query.get("bins", 100))
+        if not 0 < bins <= MAX_BINS:
+            raise ValueError(f"bins must be in 1..{MAX_BINS}")
+        smooth_sigma = float(query.get("smooth_sigma", 1.0))
+        if not 0 <= smooth_sigma <= bins:
+            raise ValueError("smooth_sigma must be in 0..bins")
+        dpi = min(max(int(query.get("dpi", 100)), DPI_RANGE[0]), DPI_RANGE[1])
+
+        options = {
+            "vis_type": vis_type,
+            "param": param,
+            "frame": frame,
+            "cmap": cmap,
+            "title": query.get("title", defaults.get("title", param)),
+            "units": query.get("units", defaults.get("units", "")),
+            "bins": bins,
+            "smooth_sigma": smooth_sigma,
+            "dpi": dpi,
+        }
+        if param_x is not None:
+            options["param_x"] = param_x
+            options["units_x"] = query.get("units_x", UNITS_X[param_x])
+
+        return options
+
+    def render(self, options: Dict) -> bytes:
+        key = self.make_key(options)
+
+        data = self.cache.get(key)
+        if data is not None:
+            self._count("hits")
+            return data
+
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            if future is None:
+                # Владелец мог уже положить результат в кеш и снять запись
+                data = self.cache.get(key)
+                if data is not None:
+                    self._count("hits")
+                    return data
+                future = Future()
+                self._inflight[key] = future
+                owner = True
+            else:
+                owner = False
+                self._count("coalesced")
+
+        if not owner:
+            return future.result()
+
+        try:
+            with self._render_lock:
+                data = self.visualizer.render_frame(**options)
+            self._count("renders")
+            self.cache.put(key, data)
+            future.set_result(data)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+
+        return data
+
+
+def make_handler(service: RenderService):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlsplit(self.path)
+            parts = [p for p in url.path.split("/") if p]
+            if not parts:
+                self._send(404, b"not found", "text/plain")
+                return
+
+            try:
+                options = service.options(
+                    parts[0], parts[1:], dict(parse_qsl(url.query))
+                )
+            except KeyError as e:
+                self._send(404, f"not found: {e}".encode(), "text/plain")
+                return
+            except ValueError as e:
+                self._send(400, str(e).encode(), "text/plain")
+                return
+
+            try:
+                data = service.render(options)
+            except Exception as e:
+                self._send(500, str(e).encode(), "text/plain")
+                return
+
+            self._send(200, data, "image/png")
+
+        def _send(self, code: int, body: bytes, content_type: str) -> None:
+            self.send_response(code)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+class RenderServer(ThreadingHTTPServer):
+    # Очередь по умолчанию (5) переполняется при параллельных клиентах
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def make_server(
+    service: RenderService, host: str = "127.0.0.1", port: int = 8050
+) -> RenderServer:
+    return RenderServer((host, port), make_handler(service))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="On-demand render service")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8050)
+    parser.add_argument("--cache_dir", type=str, default="cache/frames")
+    parser.add_argument("--memory_mb", type=int, default=256)
+    parser.add_argument("--disk_mb", type=int, default=2048)
+    # Необязательная выборка, как у download.py
+    parser.add_argument("--north", type=float, default=None)
+    parser.add_argument("--south", type=float, default=None)
+    parser.add_argument("--east", type=float, default=None)
+    parser.add_argument("--west", type=float, default=None)
+    parser.add_argument("--start", type=str, default=None)
+    parser.add_argument("--end", type=str, default=None)
+    args = parser.parse_args()
+
+    from src.data.preprocess import DS_MAIN
+
+    cache = FrameCache(
+        max_bytes=args.memory_mb * 2**20,
+        cache_dir=args.cache_dir,
+        max_disk_bytes=args.disk_mb * 2**20,
+    )
+    subset = Subset(
+        north=args.north,
+        west=args.west,
+        south=args.south,
+        east=args.east,
+        start=args.start,
+        end=args.end,
+    )
+    server = make_server(RenderService(DS_MAIN, cache, subset), args.host, args.port)
+    print(f"Serving on http://{args.host}:{server.server_port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
+import io
 import os
 import time
+from collections import OrderedDict
 from typing import Dict, Optional, Text, Tuple, Union
 
 import cartopy.crs as ccrs
@@ -12,6 +14,7 @@ from matplotlib.ticker import LogLocator
 from mpl_toolkits.axes_grid1 import make_axes_locatable
 from xarray import DataArray, Dataset
 
+from src.utils.subset import Subset
 from src.visualizer.kde import kde1d, kde2d
 
 
@@ -23,23 +26,37 @@ class Visualizer:
         fps: int = 5,
         save_frames: bool = True,
         verbose: bool = True,
+        subset: Optional[Subset] = None,
+        max_figures: int = 8,
     ):
-        self.ds = ds
+        # Выборка применяется до чтения данных: дальше всё работает только с ней
+        self.subset = subset
+        self.ds = subset.apply(ds) if subset is not None else ds
         self.interval = interval
         self.fps = fps
         self.save_frames = save_frames
         self.verbose = verbose
 
+        conversions = {
+            "u10": lambda x: x,
+            "v10": lambda x: x,
+            "t2m": lambda x: x - 273.15,
+            "sst": lambda x: x - 273.15,
+            "sp": lambda x: x * 0.00750062,
+            "skt": lambda x: x - 273.15,
+            "tp": lambda x: x * 1000,
+        }
         self.params: Dict[str, DataArray] = {
-            "u10": ds["u10"],
-            "v10": ds["v10"],
-            "t2m": ds["t2m"] - 273.15,
-            "sst": ds["sst"] - 273.15,
-            "sp": ds["sp"] * 0.00750062,
-            "skt": ds["skt"] - 273.15,
-            "tp": ds["tp"] * 1000,
+            param: convert(self.ds[param])
+            for param, convert in conversions.items()
+            if param in self.ds.data_vars
         }
 
+        # Тёплые фигуры для render_frame: (vis_type, param, cmap, units) -> состояние.
+        # LRU не больше max_figures, вытесненные фигуры закрываются
+        self.max_figures = max_figures
+        self._figures: "OrderedDict[Tuple[str, str, str, str], Dict]" = OrderedDict()
+
     def _global_extremum(self, param: str) -> Tuple:
         """Подготовка глобальных min/max для параметра."""
         global_vmin = float(self.params[param].min().values)
@@ -48,6 +65,17 @@ class Visualizer:
             global_vmin = max(1e-4, global_vmin)
         return global_vmin, global_vmax
 
+    def _map_projection(self) -> ccrs.PlateCarree:
+        """
+        Проекция осей карты. Для bbox по долготе центр проекции ставится в
+        середину bbox, иначе регион через шов (170..190) растягивается на
+        весь глобус. Данные по-прежнему рисуются с transform=PlateCarree().
+        """
+        if self.subset is not None and self.subset.west is not None:
+            west, east = self.subset.extent(self.ds)[:2]
+            return ccrs.PlateCarree(central_longitude=(west + east) / 2)
+        return ccrs.PlateCarree()
+
     def _update_map_frame(
         self,
         frame: int,
@@ -65,7 +93,12 @@ class Visualizer:
     ) -> Tuple:
         """Обновление кадра для типа 'map'."""
         ax.clear()
-        ax.set_global()  # type: ignore
+        if self.subset is not None and self.subset.has_bbox:
+            ax.set_extent(  # type: ignore
+                self.subset.extent(self.ds), crs=ccrs.PlateCarree()
+            )
+        else:
+            ax.set_global()  # type: ignore
         ax.coastlines(linewidth=0.8)  # type: ignore
         gl = ax.gridlines(  # type: ignore
             draw_labels=True, linewidth=0.5, color="gray", alpha=0.5, linestyle="--"
@@ -211,7 +244,11 @@ class Visualizer:
             if vis_type == "map"
             else plt.figure(figsize=(14, 8))
         )
-        ax = plt.axes(projection=ccrs.PlateCarree()) if vis_type == "map" else plt.gca()
+        ax = (
+            plt.axes(projection=self._map_projection())
+            if vis_type == "map"
+            else plt.gca()
+        )
         divider = make_axes_locatable(ax) if vis_type == "map" else None
         cax = (
             divider.append_axes("right", size="5%", pad=0.1, axes_class=plt.Axes)
@@ -279,6 +316,129 @@ class Visualizer:
 
         plt.close(fig)
 
+    def render_frame(
+        self,
+        vis_type: str,
+        param: str,
+        frame: Union[int, None] = None,
+        cmap: str = "viridis",
+        title: str = None,
+        units: str = "",
+        param_x: str = "valid_time",
+        units_x: str = "",
+        bins: Union[int, Tuple[int, int]] = 100,
+        smooth_sigma: float = 1.0,
+        dpi: int = 100,
+    ) -> bytes:
+        """
+        Рендер одного кадра в PNG (bytes) без записи в frames/.
+        Фигуры map и kde1d создаются один раз на (vis_type, param, cmap, units)
+        и переиспользуются между вызовами (colorbar строится при создании).
+        Хранятся не больше max_figures фигур; фигура неудачного рендера
+        закрывается.
+        """
+        if vis_type not in ["map", "kde1d", "kde2d"]:
+            raise ValueError("vis_type must be one of: 'map', 'kde1d', 'kde2d'")
+
+        buf = io.BytesIO()
+
+        if vis_type == "kde2d":
+            figures = set(plt.get_fignums())
+            try:
+                self.plot_kde2d(
+                    param,
+                    param_x,
+                    cmap=cmap,
+                    title=title,
+                    units_y=units,
+                    units_x=units_x,
+                    frame=frame,
+                    bins=bins,
+                    smooth_sigma=smooth_sigma,
+                    save_path=buf,
+                    dpi=dpi,
+                )
+            except Exception:
+                for number in set(plt.get_fignums()) - figures:
+                    plt.close(number)
+                raise
+            return buf.getvalue()
+
+        if frame is None:
+            raise ValueError("frame is required for 'map' and 'kde1d'")
+
+        key = (vis_type, param, cmap, units)
+        state = self._figures.get(key)
+        if state is None:
+            if vis_type == "map":
+                fig = plt.figure(figsize=(20, 12))
+                ax = plt.axes(projection=self._map_projection())
+                cax = make_axes_locatable(ax).append_axes(
+                    "right", size="5%", pad=0.1, axes_class=plt.Axes
+                )
+                global_vmin, global_vmax = self._global_extremum(param)
+            else:
+                fig = plt.figure(figsize=(14, 8))
+                ax = fig.gca()
+                cax = None
+                global_vmin, global_vmax = None, None
+            state = {
+                "fig": fig,
+                "ax": ax,
+                "cax": cax,
+                "cb": None,
+                "min_text": None,
+                "max_text": None,
+                "global_vmin": global_vmin,
+                "global_vmax": global_vmax,
+            }
+            self._figures[key] = state
+            while len(self._figures) > self.max_figures:
+                _, evicted = self._figures.popitem(last=False)
+                plt.close(evicted["fig"])
+        else:
+            self._figures.move_to_end(key)
+
+        save_frames, self.save_frames = self.save_frames, False
+        try:
+            plt.figure(state["fig"].number)
+            if vis_type == "map":
+                _, state["cb"], state["min_text"], state["max_text"] = (
+                    self._update_map_frame(
+                        frame,
+                        state["ax"],
+                        state["cax"],
+                        param,
+                        cmap,
+                        title,
+                        units,
+                        state["cb"],
+                        state["min_text"],
+                        state["max_text"],
+                        state["global_vmin"],
+                        state["global_vmax"],
+                    )
+                )
+            else:
+                self._update_kde1d_frame(
+                    frame, state["ax"], param, title, units, bins, smooth_sigma
+                )
+            state["fig"].savefig(buf, format="png", dpi=dpi)
+        except Exception:
+            # После ошибки фигура может остаться в неполном состоянии
+            plt.close(self._figures.pop(key)["fig"])
+            raise
+        finally:
+            self.save_frames = save_frames
+
+        return buf.getvalue()
+
+    def close_figures(self) -> None:
+        """Закрывает тёплые фигуры render_frame."""
+        for state in self._figures.values():
+            plt.close(state["fig"])
+        self._figures.clear()
+
     def plot_kde2d(
         self,
         param_y: str,
@@ -292,6 +452,7 @@ class Visualizer:
         smooth_sigma: float = 1.0,
         contour: bool = True,
         save_path: str = None,
+        dpi: int = 200,
     ) -> None:
         """
         Создаёт статическую 2D KDE визуализацию (тепловая карта плотности).
@@ -397,6 +558,6 @@ class Visualizer:
                 suffix += f"_frame_{frame}"
             save_path = f"frames/kde2d/kde2d{suffix}.png"
 
-        fig.savefig(save_path, dpi=200, bbox_inches="tight")
+        fig.savefig(save_path, dpi=dpi, bbox_inches="tight")
 
         plt.close(fig)